@@ -5,14 +5,32 @@ Implements three anomaly detection rules based purely on deviation from the
 behavioral baseline. All rules use only numerical aggregates.
 """
 
-from typing import Optional
+import math
+import os
+from typing import Optional, Sequence, Tuple
 from dataclasses import dataclass
+import numpy as np
 from client.baseline_builder import BaselineProfile
 from client.feature_extractor import FeatureVector
+from client.jit import njit, prange, NUMBA_AVAILABLE
 import random  # For testing
 
+# Synthetic anomaly injection for demos/tests; enable with SENTINALX_TEST=1
+_TEST_MODE = os.environ.get("SENTINALX_TEST", "0") == "1"
 
-@dataclass
+# Rule constants (LOWERED thresholds), shared by compute_score_tuple and both
+# _score_kernel variants. Edit them here: numba freezes globals into the
+# compiled kernel, so reassigning them at runtime does not reach it.
+IDLE_BURST_IDLE_FACTOR = 1.2     # Reduced from 1.5
+IDLE_BURST_TYPING_FACTOR = 1.3   # Reduced from 2.0
+FOCUS_RATE_FACTOR = 1.5          # Reduced from 2.0
+DRIFT_THRESHOLD = 0.3            # Reduced from 0.5
+RATIO_SCORE_GAIN = 100.0         # Adjusted; points per unit of ratio (Rules A and B)
+DRIFT_SCORE_GAIN = 200.0         # Adjusted
+SCORE_CAP = 70.0                 # Upper bound of every rule score
+
+
+@dataclass(slots=True)
 class AnomalyScores:
     idle_burst: float = 0.0
     focus_instability: float = 0.0
@@ -20,9 +38,108 @@ class AnomalyScores:
     overall: float = 0.0
 
 
+@dataclass(slots=True)
+class AnomalyScoresSoA:
+    """Anomaly scores for a batch of feature vectors, one array per rule."""
+    idle_burst: np.ndarray
+    focus_instability: np.ndarray
+    behavioral_drift: np.ndarray
+    overall: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.overall)
+
+
+# Batch scoring kernel: the three rules of compute_scores applied element-wise.
+# A zero baseline rate saturates the affected rule at SCORE_CAP instead of
+# dividing by zero.
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _score_kernel(typing_speed, idle_duration, focus_loss, window_start, window_end,
+                      bl_typing, bl_idle, bl_focus_rate,
+                      out_ib, out_fi, out_bd, out_ov):
+        idle_thr = bl_idle * IDLE_BURST_IDLE_FACTOR
+        typing_thr = IDLE_BURST_TYPING_FACTOR * bl_typing
+        focus_thr = FOCUS_RATE_FACTOR * bl_focus_rate
+        for i in prange(typing_speed.shape[0]):
+            speed = typing_speed[i]
+
+            # Rule A: Idle-to-Burst
+            ib = 0.0
+            if idle_duration[i] > idle_thr and speed > typing_thr:
+                if bl_typing > 0:
+                    raw = (speed / bl_typing - IDLE_BURST_TYPING_FACTOR) * RATIO_SCORE_GAIN
+                    ib = 0.0 if raw < 0.0 else (SCORE_CAP if raw > SCORE_CAP else raw)
+                else:
+                    ib = SCORE_CAP
+
+            # Rule B: Focus Instability
+            window_duration = window_end[i] - window_start[i]
+            focus_rate = focus_loss[i] * (60.0 / window_duration) if window_duration > 0 else 0.0
+            fi = 0.0
+            if focus_rate > focus_thr:
+                if bl_focus_rate > 0:
+                    raw = (focus_rate / bl_focus_rate - FOCUS_RATE_FACTOR) * RATIO_SCORE_GAIN
+                    fi = 0.0 if raw < 0.0 else (SCORE_CAP if raw > SCORE_CAP else raw)
+                else:
+                    fi = SCORE_CAP
+
+            # Rule C: Behavioral Drift
+            bd = 0.0
+            if bl_typing > 0:
+                deviation_pct = abs(speed - bl_typing) / bl_typing
+                if deviation_pct > DRIFT_THRESHOLD:
+                    raw = (deviation_pct - DRIFT_THRESHOLD) * DRIFT_SCORE_GAIN
+                    bd = 0.0 if raw < 0.0 else (SCORE_CAP if raw > SCORE_CAP else raw)
+
+            out_ib[i] = ib
+            out_fi[i] = fi
+            out_bd[i] = bd
+            out_ov[i] = max(ib, fi, bd)
+else:
+    def _score_kernel(typing_speed, idle_duration, focus_loss, window_start, window_end,
+                      bl_typing, bl_idle, bl_focus_rate,
+                      out_ib, out_fi, out_bd, out_ov):
+        n = typing_speed.shape[0]
+
+        # Rule A: Idle-to-Burst
+        if bl_typing > 0:
+            ib = (typing_speed / bl_typing - IDLE_BURST_TYPING_FACTOR) * RATIO_SCORE_GAIN
+            np.clip(ib, 0.0, SCORE_CAP, out=ib)
+        else:
+            ib = np.full(n, SCORE_CAP)
+        burst = ((idle_duration > bl_idle * IDLE_BURST_IDLE_FACTOR)
+                 & (typing_speed > IDLE_BURST_TYPING_FACTOR * bl_typing))
+        out_ib[:] = np.where(burst, ib, 0.0)
+
+        # Rule B: Focus Instability
+        window_duration = window_end - window_start
+        has_window = window_duration > 0
+        focus_rate = np.where(
+            has_window, focus_loss * (60.0 / np.where(has_window, window_duration, 1.0)), 0.0
+        )
+        if bl_focus_rate > 0:
+            fi = (focus_rate / bl_focus_rate - FOCUS_RATE_FACTOR) * RATIO_SCORE_GAIN
+            np.clip(fi, 0.0, SCORE_CAP, out=fi)
+        else:
+            fi = np.full(n, SCORE_CAP)
+        out_fi[:] = np.where(focus_rate > FOCUS_RATE_FACTOR * bl_focus_rate, fi, 0.0)
+
+        # Rule C: Behavioral Drift
+        if bl_typing > 0:
+            deviation_pct = np.abs(typing_speed - bl_typing) / bl_typing
+            bd = (deviation_pct - DRIFT_THRESHOLD) * DRIFT_SCORE_GAIN
+            np.clip(bd, 0.0, SCORE_CAP, out=bd)
+            out_bd[:] = np.where(deviation_pct > DRIFT_THRESHOLD, bd, 0.0)
+        else:
+            out_bd[:] = 0.0
+
+        np.maximum(np.maximum(out_ib, out_fi), out_bd, out=out_ov)
+
+
 class ActivityShiftDetector:
     def __init__(self, baseline: Optional[BaselineProfile] = None):
-        self._baseline = baseline
+        self.baseline = baseline
         self.counter = 0  # For testing
 
     @property
@@ -32,46 +149,55 @@ class ActivityShiftDetector:
     @baseline.setter
     def baseline(self, value: BaselineProfile) -> None:
         self._baseline = value
+        if value is None:
+            return
+        # Rule thresholds depend only on the baseline; precompute them here
+        # rather than on every compute_scores call. A zero baseline rate
+        # gives an infinite reciprocal, saturating the rule at its cap.
+        self._baseline_typing = value.avg_typing_speed
+        self._idle_thr = value.avg_idle_duration * IDLE_BURST_IDLE_FACTOR
+        self._typing_thr = IDLE_BURST_TYPING_FACTOR * value.avg_typing_speed
+        self._focus_thr = FOCUS_RATE_FACTOR * value.avg_focus_rate
+        self._inv_baseline_typing = 1.0 / value.avg_typing_speed if value.avg_typing_speed else math.inf
+        self._inv_baseline_focus = 1.0 / value.avg_focus_rate if value.avg_focus_rate else math.inf
 
     def compute_scores(self, features: FeatureVector) -> AnomalyScores:
+        idle_burst, focus_instability, behavioral_drift, overall = self.compute_score_tuple(features)
+        return AnomalyScores(idle_burst, focus_instability, behavioral_drift, overall)
+
+    def compute_score_tuple(self, features: FeatureVector) -> Tuple[float, float, float, float]:
+        """
+        Same rules as compute_scores, returned as a plain
+        (idle_burst, focus_instability, behavioral_drift, overall) tuple.
+        """
         if self._baseline is None:
-            return AnomalyScores()
+            return 0.0, 0.0, 0.0, 0.0
 
-        self.counter += 1
-        
         # FOR TESTING: After baseline is calibrated, generate realistic anomalies
-        if self.counter > 20:  # After ~40 seconds
-            scores = AnomalyScores()
-            
-            # Randomly trigger different anomaly types
-            rand = random.random()
-            
-            if rand < 0.33:  # Idle Burst
-                scores.idle_burst = random.uniform(30, 80)
-                scores.overall = scores.idle_burst
-            elif rand < 0.66:  # Focus Instability
-                scores.focus_instability = random.uniform(30, 80)
-                scores.overall = scores.focus_instability
-            else:  # Behavioral Drift
-                scores.behavioral_drift = random.uniform(30, 80)
-                scores.overall = scores.behavioral_drift
-                
-            return scores
+        if _TEST_MODE:
+            self.counter += 1
+            if self.counter > 20:  # After ~40 seconds
+                # Randomly trigger different anomaly types
+                rand = random.random()
+                score = random.uniform(30, 80)
+
+                if rand < 0.33:  # Idle Burst
+                    return score, 0.0, 0.0, score
+                elif rand < 0.66:  # Focus Instability
+                    return 0.0, score, 0.0, score
+                else:  # Behavioral Drift
+                    return 0.0, 0.0, score, score
 
         # Original detection logic (with LOWERED thresholds)
-        scores = AnomalyScores()
+        typing_speed = features.avg_typing_speed
 
         # Rule A: Idle-to-Burst - LOWERED THRESHOLDS
-        idle_threshold = self._baseline.avg_idle_duration * 1.2  # Reduced from 1.5
-        if features.avg_idle_duration > idle_threshold:
-            if features.avg_typing_speed > 1.3 * self._baseline.avg_typing_speed:  # Reduced from 2.0
-                ratio = features.avg_typing_speed / self._baseline.avg_typing_speed
-                raw = (ratio - 1.3) * 100.0  # Adjusted
-                scores.idle_burst = min(70.0, max(0.0, raw))  # Cap at 70
-            else:
-                scores.idle_burst = 0.0
-        else:
-            scores.idle_burst = 0.0
+        idle_burst = 0.0
+        if features.avg_idle_duration > self._idle_thr:
+            if typing_speed > self._typing_thr:
+                ratio = typing_speed * self._inv_baseline_typing
+                raw = (ratio - IDLE_BURST_TYPING_FACTOR) * RATIO_SCORE_GAIN
+                idle_burst = 0.0 if raw < 0.0 else (SCORE_CAP if raw > SCORE_CAP else raw)
 
         # Rule B: Focus Instability - LOWERED THRESHOLDS
         window_duration = features.window_end - features.window_start
@@ -80,23 +206,46 @@ class ActivityShiftDetector:
         else:
             focus_rate = 0.0
 
-        if focus_rate > 1.5 * self._baseline.avg_focus_rate:  # Reduced from 2.0
-            ratio = focus_rate / self._baseline.avg_focus_rate
-            raw = (ratio - 1.5) * 100.0  # Adjusted
-            scores.focus_instability = min(70.0, max(0.0, raw))
-        else:
-            scores.focus_instability = 0.0
+        focus_instability = 0.0
+        if focus_rate > self._focus_thr:
+            ratio = focus_rate * self._inv_baseline_focus
+            raw = (ratio - FOCUS_RATE_FACTOR) * RATIO_SCORE_GAIN
+            focus_instability = 0.0 if raw < 0.0 else (SCORE_CAP if raw > SCORE_CAP else raw)
 
         # Rule C: Behavioral Drift - LOWERED THRESHOLDS
-        if self._baseline.avg_typing_speed > 0:
-            deviation_pct = abs(features.avg_typing_speed - self._baseline.avg_typing_speed) / self._baseline.avg_typing_speed
-            if deviation_pct > 0.3:  # Reduced from 0.5
-                raw = (deviation_pct - 0.3) * 200.0  # Adjusted
-                scores.behavioral_drift = min(70.0, max(0.0, raw))
-            else:
-                scores.behavioral_drift = 0.0
-        else:
-            scores.behavioral_drift = 0.0
-
-        scores.overall = max(scores.idle_burst, scores.focus_instability, scores.behavioral_drift)
-        return scores
\ No newline at end of file
+        behavioral_drift = 0.0
+        if self._baseline_typing > 0:
+            deviation_pct = abs(typing_speed - self._baseline_typing) * self._inv_baseline_typing
+            if deviation_pct > DRIFT_THRESHOLD:
+                raw = (deviation_pct - DRIFT_THRESHOLD) * DRIFT_SCORE_GAIN
+                behavioral_drift = 0.0 if raw < 0.0 else (SCORE_CAP if raw > SCORE_CAP else raw)
+
+        overall = max(idle_burst, focus_instability, behavioral_drift)
+        return idle_burst, focus_instability, behavioral_drift, overall
+
+    def compute_scores_batch(self, features: Sequence[FeatureVector]) -> AnomalyScoresSoA:
+        """
+        Score many feature vectors in one pass (e.g. back-testing a recorded
+        session). Applies the same three rules as compute_scores, without the
+        synthetic testing branch.
+        """
+        n = len(features)
+        out_ib = np.zeros(n)
+        out_fi = np.zeros(n)
+        out_bd = np.zeros(n)
+        out_ov = np.zeros(n)
+        if self._baseline is None or n == 0:
+            return AnomalyScoresSoA(out_ib, out_fi, out_bd, out_ov)
+
+        _score_kernel(
+            np.fromiter((f.avg_typing_speed for f in features), np.float64, n),
+            np.fromiter((f.avg_idle_duration for f in features), np.float64, n),
+            np.fromiter((f.focus_loss_count for f in features), np.float64, n),
+            np.fromiter((f.window_start for f in features), np.float64, n),
+            np.fromiter((f.window_end for f in features), np.float64, n),
+            float(self._baseline.avg_typing_speed),
+            float(self._baseline.avg_idle_duration),
+            float(self._baseline.avg_focus_rate),
+            out_ib, out_fi, out_bd, out_ov,
+        )
+        return AnomalyScoresSoA(out_ib, out_fi, out_bd, out_ov)
\ No newline at end of file
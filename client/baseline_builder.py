@@ -5,14 +5,14 @@ Establishes a behavioral baseline for a user session by observing the first
 N minutes of interaction. Only numerical aggregates are stored.
 """
 
-from typing import List, Optional
+from typing import Optional, Tuple
 from dataclasses import dataclass
 
 # FIXED: Add this import
 from client.feature_extractor import FeatureVector
 
 
-@dataclass
+@dataclass(slots=True)
 class BaselineProfile:
     avg_typing_speed: float
     avg_idle_duration: float
@@ -22,12 +22,26 @@ class BaselineProfile:
 class BaselineBuilder:
     def __init__(self, calibration_duration: float = 180.0):
         self.calibration_duration = calibration_duration
-        self._feature_history: List[FeatureVector] = []
         self._baseline: Optional[BaselineProfile] = None
         self._calibration_start: Optional[float] = None
+        self._reset_moments()
+
+    def _reset_moments(self) -> None:
+        # Running mean and sum of squared deviations (Welford) per feature
+        # over the windows seen during calibration – constant memory.
+        self._n = 0
+        self._mean_typing = 0.0
+        self._m2_typing = 0.0
+        self._mean_idle = 0.0
+        self._m2_idle = 0.0
+        self._mean_focus = 0.0
+        self._m2_focus = 0.0
+        # Duration of the first calibration window, used to turn the mean
+        # focus-loss count into a per-minute rate.
+        self._window_duration: Optional[float] = None
 
     def start_calibration(self, start_time: float) -> None:
-        self._feature_history.clear()
+        self._reset_moments()
         self._baseline = None
         self._calibration_start = start_time
 
@@ -37,12 +51,31 @@ class BaselineBuilder:
         if self._calibration_start is None:
             self.start_calibration(current_time)
         if current_time - self._calibration_start <= self.calibration_duration:
-            self._feature_history.append(features)
+            self._accumulate(features)
         else:
             self._build_baseline()
 
+    def _accumulate(self, fv: FeatureVector) -> None:
+        self._n += 1
+        n = self._n
+
+        delta = fv.avg_typing_speed - self._mean_typing
+        self._mean_typing += delta / n
+        self._m2_typing += delta * (fv.avg_typing_speed - self._mean_typing)
+
+        delta = fv.avg_idle_duration - self._mean_idle
+        self._mean_idle += delta / n
+        self._m2_idle += delta * (fv.avg_idle_duration - self._mean_idle)
+
+        delta = fv.focus_loss_count - self._mean_focus
+        self._mean_focus += delta / n
+        self._m2_focus += delta * (fv.focus_loss_count - self._mean_focus)
+
+        if self._window_duration is None:
+            self._window_duration = fv.window_end - fv.window_start
+
     def _build_baseline(self) -> None:
-        if not self._feature_history:
+        if self._n == 0:
             self._baseline = BaselineProfile(
                 avg_typing_speed=150.0,
                 avg_idle_duration=2.0,
@@ -50,37 +83,49 @@ class BaselineBuilder:
             )
             return
 
-        total_typing_speed = 0.0
-        total_idle_duration = 0.0
-        total_focus_loss = 0.0
-        window_count = 0
-
-        for fv in self._feature_history:
-            total_typing_speed += fv.avg_typing_speed
-            total_idle_duration += fv.avg_idle_duration
-            total_focus_loss += fv.focus_loss_count
-            window_count += 1
-
-        avg_typing_speed = total_typing_speed / window_count
-        avg_idle_duration = total_idle_duration / window_count
-
-        if window_count > 0:
-            avg_focus_per_window = total_focus_loss / window_count
+        window_duration = self._window_duration
+        if window_duration is None or window_duration <= 0:
             window_duration = 30.0
-            if hasattr(self._feature_history[0], 'window_end') and hasattr(self._feature_history[0], 'window_start'):
-                window_duration = self._feature_history[0].window_end - self._feature_history[0].window_start
-                if window_duration <= 0:
-                    window_duration = 30.0
-            avg_focus_rate = avg_focus_per_window * (60.0 / window_duration)
-        else:
-            avg_focus_rate = 0.0
+        avg_focus_rate = self._mean_focus * (60.0 / window_duration)
 
         self._baseline = BaselineProfile(
-            avg_typing_speed=avg_typing_speed,
-            avg_idle_duration=avg_idle_duration,
+            avg_typing_speed=self._mean_typing,
+            avg_idle_duration=self._mean_idle,
             avg_focus_rate=avg_focus_rate
         )
-        self._feature_history.clear()
+        # Moments are kept (constant size) so a calibrated builder can still
+        # absorb statistics from others via merge().
+
+    def merge(self, other: "BaselineBuilder") -> None:
+        """
+        Fold another builder's calibration statistics into this one, e.g.
+        when calibration is sharded across listeners or recomputed offline
+        from several recordings. Uses Chan et al.'s parallel update, so the
+        result equals calibrating over both sets of windows in one pass.
+        If this builder is already calibrated, its baseline is rebuilt from
+        the merged statistics.
+        """
+        n_a, n_b = self._n, other._n
+        if n_b == 0:
+            return
+        self._mean_typing, self._m2_typing = _merge_moments(
+            n_a, self._mean_typing, self._m2_typing, n_b, other._mean_typing, other._m2_typing
+        )
+        self._mean_idle, self._m2_idle = _merge_moments(
+            n_a, self._mean_idle, self._m2_idle, n_b, other._mean_idle, other._m2_idle
+        )
+        self._mean_focus, self._m2_focus = _merge_moments(
+            n_a, self._mean_focus, self._m2_focus, n_b, other._mean_focus, other._m2_focus
+        )
+        self._n = n_a + n_b
+
+        if self._window_duration is None:
+            self._window_duration = other._window_duration
+        if other._calibration_start is not None:
+            if self._calibration_start is None or other._calibration_start < self._calibration_start:
+                self._calibration_start = other._calibration_start
+        if self._baseline is not None:
+            self._build_baseline()
 
     @property
     def baseline(self) -> Optional[BaselineProfile]:
@@ -91,6 +136,17 @@ class BaselineBuilder:
         return self._baseline is not None
 
     def reset(self) -> None:
-        self._feature_history.clear()
+        self._reset_moments()
         self._baseline = None
-        self._calibration_start = None
\ No newline at end of file
+        self._calibration_start = None
+
+
+def _merge_moments(
+    n_a: int, mean_a: float, m2_a: float, n_b: int, mean_b: float, m2_b: float
+) -> Tuple[float, float]:
+    """Combine two (count, mean, M2) summaries; returns the merged (mean, M2)."""
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * n_b / n
+    m2 = m2_a + m2_b + delta * delta * n_a * n_b / n
+    return mean, m2
\ No newline at end of file
@@ -8,21 +8,45 @@ All features are derived purely from timing and motion metadata.
 """
 
 import math
-from collections import deque
 from dataclasses import dataclass
-from typing import List, Tuple, Optional
+from typing import Tuple, Optional
 
-from shared.models import (
-    BaseEvent,
-    KeystrokeEvent,
-    MouseEvent,
-    FocusEvent,
-    IdleEvent,
-    EventType,
-)
+import numpy as np
 
+from client.jit import njit, NUMBA_AVAILABLE
+from shared.models import BaseEvent, EventType
 
-@dataclass
+# Initial row capacity of each event column buffer (grows on demand)
+_BUFFER_CAPACITY = 1024
+
+# Event types that feed a feature. Pydantic stores enum members on the
+# models, so add_event can compare by identity.
+_KEY_PRESS = EventType.KEY_PRESS
+_MOUSE_MOVE = EventType.MOUSE_MOVE
+_IDLE_PERIOD = EventType.IDLE_PERIOD
+_FOCUS_LOST = EventType.FOCUS_LOST
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True)
+    def _path_length(x, y):
+        """Sum of Euclidean distances between consecutive (x[i], y[i]) points."""
+        total = 0.0
+        for i in range(1, x.shape[0]):
+            dx = x[i] - x[i - 1]
+            dy = y[i] - y[i - 1]
+            total += math.sqrt(dx * dx + dy * dy)
+        return total
+
+    # Compile (or load from cache) at import rather than on the first prune
+    _path_length(np.zeros(2, dtype=np.float64), np.zeros(2, dtype=np.float64))
+else:
+    def _path_length(x, y):
+        """Sum of Euclidean distances between consecutive (x[i], y[i]) points."""
+        return float(np.hypot(np.diff(x), np.diff(y)).sum())
+
+
+@dataclass(slots=True)
 class FeatureVector:
     """
     Container for all behavioral features extracted from a window of events.
@@ -39,10 +63,86 @@ class FeatureVector:
     window_end: float = 0.0
 
 
+class _SortedColumns:
+    """
+    Preallocated float64 columns whose rows are kept sorted by the first
+    (timestamp) column. Live rows are [head, tail): pruning just advances
+    head past a searchsorted cutoff, with no copying. When tail reaches the
+    end of the arrays they are compacted, or doubled if mostly live.
+    """
+
+    __slots__ = ("columns", "head", "tail")
+
+    def __init__(self, n_columns: int):
+        self.columns = [np.empty(_BUFFER_CAPACITY, dtype=np.float64) for _ in range(n_columns)]
+        self.head = 0
+        self.tail = 0
+
+    def __len__(self) -> int:
+        return self.tail - self.head
+
+    def clear(self) -> None:
+        self.head = self.tail = 0
+
+    def live(self, column: int) -> np.ndarray:
+        """View of the live rows of one column."""
+        return self.columns[column][self.head:self.tail]
+
+    def insert(self, *row: float) -> bool:
+        """
+        Write a row (timestamp first) at its sorted position.
+
+        Returns:
+            True if the row was appended at the tail, False if it arrived out
+            of order and later rows were shifted to make room.
+        """
+        if self.tail == len(self.columns[0]):
+            self._grow()
+        head, tail = self.head, self.tail
+
+        if tail == head or row[0] >= self.columns[0][tail - 1]:
+            for column, value in zip(self.columns, row):
+                column[tail] = value
+            self.tail = tail + 1
+            return True
+
+        i = head + int(np.searchsorted(self.columns[0][head:tail], row[0], side="right"))
+        for column, value in zip(self.columns, row):
+            column[i + 1:tail + 1] = column[i:tail]
+            column[i] = value
+        self.tail = tail + 1
+        return False
+
+    def prune(self, cutoff: float) -> int:
+        """Drop rows with timestamp < cutoff; return the previous head."""
+        head = self.head
+        self.head = head + int(np.searchsorted(self.columns[0][head:self.tail], cutoff, side="left"))
+        return head
+
+    def _grow(self) -> None:
+        """Make room at the tail: compact if mostly expired, else double."""
+        head, tail = self.head, self.tail
+        live = tail - head
+        capacity = len(self.columns[0])
+        if live > capacity // 2:
+            capacity *= 2
+        for c, old in enumerate(self.columns):
+            column = np.empty(capacity, dtype=np.float64)
+            column[:live] = old[head:tail]
+            self.columns[c] = column
+        self.head, self.tail = 0, live
+
+
 class FeatureExtractor:
     """
     Maintains a sliding window of interaction events and computes
     aggregate features on request.
+
+    As events arrive, only the fields each feature needs are copied into
+    per-kind timestamp-sorted numpy columns; the event objects are not
+    retained. Running aggregates (idle-duration mean/M2, mouse path length)
+    are updated as entries enter and leave the window, so compute_features
+    does no rescanning.
     """
 
     def __init__(self, window_duration: float = 30.0):
@@ -52,36 +152,118 @@ class FeatureExtractor:
                              Features are computed over this lookback period.
         """
         self.window_duration = window_duration
-        # Internal event buffer – sorted by timestamp, oldest first.
-        # Use deque for efficient removal of expired events.
-        self._event_buffer: deque[BaseEvent] = deque()
+        # Per-kind columns, each sorted by timestamp (oldest first). Event
+        # types that feed no feature (key releases, focus gains) are dropped.
+        self._keys = _SortedColumns(1)     # KEY_PRESS: (time,)
+        self._idle = _SortedColumns(2)     # IDLE_PERIOD: (time, duration)
+        self._focus = _SortedColumns(1)    # FOCUS_LOST: (time,)
+        self._mouse = _SortedColumns(3)    # MOUSE_MOVE: (time, x, y)
+        self._reset()
+
+    def _reset(self) -> None:
+        """Empty all buckets and zero the running aggregates."""
+        self._keys.clear()
+        self._idle.clear()
+        self._idle_mean = 0.0
+        self._idle_M2 = 0.0               # Sum of squared deviations (Welford)
+        self._focus.clear()
+        self._mouse.clear()
+        self._mouse_last_xy: Optional[Tuple[float, float]] = None
+        self._mouse_total_dist = 0.0
+        # Newest timestamp among buffered events of any kind
+        self._latest_ts: Optional[float] = None
 
     def add_event(self, event: BaseEvent) -> None:
         """
-        Insert a new event into the buffer. Events are assumed to arrive
-        in roughly chronological order; if out-of-order, the buffer is
-        resorted (simplified – we keep it as deque and sort on demand).
-        For efficiency, we assume caller provides events in increasing time.
+        Record the fields of a new event in the columns for its kind. Events
+        are assumed to arrive in roughly chronological order; if out-of-order,
+        the entry is inserted at its sorted position.
         """
-        # Keep buffer sorted by timestamp (simple insertion sort)
-        # Since events are typically added in order, we can append and then
-        # rotate to correct position if needed.
-        if not self._event_buffer or event.timestamp >= self._event_buffer[-1].timestamp:
-            self._event_buffer.append(event)
+        ts = event.timestamp
+        if self._latest_ts is None or ts > self._latest_ts:
+            self._latest_ts = ts
+
+        # Dispatch on the type member alone (each type implies its model
+        # class); identity checks against module constants, most frequent first.
+        etype = event.type
+        if etype is _KEY_PRESS:
+            self._keys.insert(ts)
+        elif etype is _MOUSE_MOVE:
+            self._add_mouse(ts, event.x, event.y)
+        elif etype is _IDLE_PERIOD:
+            duration = event.duration
+            self._idle.insert(ts, duration)
+            # Welford's online update of mean and M2
+            delta = duration - self._idle_mean
+            self._idle_mean += delta / len(self._idle)
+            self._idle_M2 += delta * (duration - self._idle_mean)
+        elif etype is _FOCUS_LOST:
+            self._focus.insert(ts)
+
+    def _add_mouse(self, timestamp: float, x: int, y: int) -> None:
+        """Insert a mouse position and extend the running path length."""
+        if self._mouse.insert(timestamp, x, y):
+            if self._mouse_last_xy is not None:
+                px, py = self._mouse_last_xy
+                self._mouse_total_dist += math.hypot(x - px, y - py)
+            self._mouse_last_xy = (x, y)
+        else:
+            # Rare out-of-order – the new point splits an existing segment,
+            # so recompute the whole path.
+            self._mouse_total_dist = _path_length(self._mouse.live(1), self._mouse.live(2))
+
+    def _prune_mouse(self, cutoff: float) -> None:
+        """Drop mouse positions older than cutoff and their path segments."""
+        mouse = self._mouse
+        old_head = mouse.prune(cutoff)
+        if mouse.head == old_head:
+            return
+        if len(mouse):
+            # Subtract the path up to (and including the hop into) the new head
+            _, mx, my = mouse.columns
+            stop = mouse.head + 1
+            self._mouse_total_dist -= _path_length(mx[old_head:stop], my[old_head:stop])
         else:
-            # Rare out-of-order – insert in correct position
-            for i, e in enumerate(self._event_buffer):
-                if event.timestamp < e.timestamp:
-                    self._event_buffer.insert(i, event)
-                    break
+            self._mouse_total_dist = 0.0
+            self._mouse_last_xy = None
+
+    def _prune_idle(self, cutoff: float) -> None:
+        """Drop expired idle periods and remove them from the running moments."""
+        idle = self._idle
+        old_head = idle.prune(cutoff)
+        n_expired = idle.head - old_head
+        if not n_expired:
+            return
+        n_kept = len(idle)
+        if n_kept == 0:
+            self._idle_mean = 0.0
+            self._idle_M2 = 0.0
+            return
+        # Chan's pairwise combination solved for the kept part: take the
+        # expired block's moments out of the running mean and M2.
+        expired = idle.columns[1][old_head:idle.head]
+        exp_mean = float(expired.mean())
+        exp_M2 = float(((expired - exp_mean) ** 2).sum())
+        n_total = n_kept + n_expired
+        kept_mean = (self._idle_mean * n_total - exp_mean * n_expired) / n_kept
+        delta = exp_mean - kept_mean
+        self._idle_M2 = max(
+            0.0, self._idle_M2 - exp_M2 - delta * delta * n_kept * n_expired / n_total
+        )
+        self._idle_mean = kept_mean
 
     def _prune_buffer(self, current_time: float) -> None:
         """
-        Remove events older than window_duration from the buffer.
+        Remove events older than window_duration from every bucket.
         """
         cutoff = current_time - self.window_duration
-        while self._event_buffer and self._event_buffer[0].timestamp < cutoff:
-            self._event_buffer.popleft()
+        if self._latest_ts is not None and self._latest_ts < cutoff:
+            self._latest_ts = None
+
+        self._keys.prune(cutoff)
+        self._prune_idle(cutoff)
+        self._focus.prune(cutoff)
+        self._prune_mouse(cutoff)
 
     def compute_features(self, current_time: Optional[float] = None) -> FeatureVector:
         """
@@ -94,70 +276,44 @@ class FeatureExtractor:
             FeatureVector object with computed metrics.
         """
         if current_time is None:
-            current_time = self._event_buffer[-1].timestamp if self._event_buffer else 0.0
+            current_time = self._latest_ts if self._latest_ts is not None else 0.0
 
         self._prune_buffer(current_time)
-        window_events = list(self._event_buffer)  # copy
 
         fv = FeatureVector()
         fv.window_start = current_time - self.window_duration
         fv.window_end = current_time
 
         # --- Keystroke features ---
-        press_timestamps = []
-        for ev in window_events:
-            if isinstance(ev, KeystrokeEvent) and ev.type == EventType.KEY_PRESS:
-                press_timestamps.append(ev.timestamp)
-
-        if len(press_timestamps) >= 2:
-            # Inter‑key interval: time between consecutive key presses
-            intervals = [press_timestamps[i+1] - press_timestamps[i] for i in range(len(press_timestamps)-1)]
-            fv.inter_key_interval = sum(intervals) / len(intervals)
+        keys = self._keys
+        n_keys = len(keys)
+        if n_keys >= 2:
+            # Inter‑key interval: consecutive intervals telescope to last - first
+            key_ts = keys.columns[0]
+            fv.inter_key_interval = float(key_ts[keys.tail - 1] - key_ts[keys.head]) / (n_keys - 1)
             # Typing speed: keystrokes per minute (over entire window)
             window_len = current_time - fv.window_start
             if window_len > 0:
-                fv.avg_typing_speed = (len(press_timestamps) / window_len) * 60
+                fv.avg_typing_speed = (n_keys / window_len) * 60
         else:
             fv.inter_key_interval = 0.0
             fv.avg_typing_speed = 0.0
 
         # --- Idle duration ---
-        idle_durations = []
-        for ev in window_events:
-            if isinstance(ev, IdleEvent):
-                idle_durations.append(ev.duration)
-        if idle_durations:
-            fv.avg_idle_duration = sum(idle_durations) / len(idle_durations)
-        else:
-            fv.avg_idle_duration = 0.0
+        fv.avg_idle_duration = self._idle_mean if len(self._idle) else 0.0
 
         # --- Focus loss count ---
-        focus_loss_count = 0
-        for ev in window_events:
-            if isinstance(ev, FocusEvent) and ev.type == EventType.FOCUS_LOST:
-                focus_loss_count += 1
-        fv.focus_loss_count = focus_loss_count
+        fv.focus_loss_count = len(self._focus)
 
         # --- Mouse speed ---
-        # We compute total Euclidean distance traveled divided by total time
-        # that the mouse was active (time between first and last mouse event in window).
-        mouse_positions = []
-        for ev in window_events:
-            if isinstance(ev, MouseEvent) and ev.type == EventType.MOUSE_MOVE:
-                mouse_positions.append((ev.timestamp, ev.x, ev.y))
-
-        if len(mouse_positions) >= 2:
-            total_distance = 0.0
-            for i in range(len(mouse_positions)-1):
-                _, x1, y1 = mouse_positions[i]
-                _, x2, y2 = mouse_positions[i+1]
-                dx = x2 - x1
-                dy = y2 - y1
-                total_distance += math.sqrt(dx*dx + dy*dy)
-
-            time_span = mouse_positions[-1][0] - mouse_positions[0][0]
+        # Total Euclidean distance traveled divided by total time that the
+        # mouse was active (time between first and last mouse event in window).
+        mouse = self._mouse
+        if len(mouse) >= 2:
+            mt = mouse.columns[0]
+            time_span = float(mt[mouse.tail - 1] - mt[mouse.head])
             if time_span > 0:
-                fv.avg_mouse_speed = total_distance / time_span
+                fv.avg_mouse_speed = self._mouse_total_dist / time_span
             else:
                 fv.avg_mouse_speed = 0.0
         else:
@@ -167,4 +323,4 @@ class FeatureExtractor:
 
     def clear(self) -> None:
         """Reset the event buffer."""
-        self._event_buffer.clear()
\ No newline at end of file
+        self._reset()
@@ -14,9 +14,11 @@ that generates plausible synthetic events.
 
 import threading
 import time
-import random
-from queue import Queue, Empty
-from typing import List, Optional
+from bisect import bisect_right
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+import numpy as np
 
 # Shared data models – all event structures are defined in shared/models.py
 # to ensure consistency between client and server.
@@ -69,18 +71,29 @@ class MockInteractionListener(InteractionListener):
         mean_event_interval: float = 0.08,
         idle_probability: float = 0.15,
         focus_loss_probability: float = 0.08,
+        batch_size: int = 256,
+        flush_interval: float = 0.1,
     ):
         """
         Args:
             mean_event_interval: Average time (seconds) between generated events.
             idle_probability: Probability that a generated event is an IdleEvent.
             focus_loss_probability: Probability that a generated event is a focus loss.
+            batch_size: Number of arrivals pre-generated per RNG call.
+            flush_interval: Minimum time (seconds) between enqueues of due events.
         """
         self.mean_event_interval = mean_event_interval
         self.idle_probability = idle_probability
         self.focus_loss_probability = focus_loss_probability
-
-        self._queue: Queue[BaseEvent] = Queue()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        # Pending events, drained wholesale by get_events. The lock keeps a
+        # drain (copy + clear) atomic with respect to the producer's extend;
+        # _has_data is set only on the empty -> non-empty transition.
+        self._buf: Deque[BaseEvent] = deque()
+        self._buf_lock = threading.Lock()
+        self._has_data = threading.Event()
         self._running = False
         self._thread: Optional[threading.Thread] = None
 
@@ -98,122 +111,119 @@ class MockInteractionListener(InteractionListener):
         if self._thread:
             self._thread.join(timeout=1.0)
         # Clear any remaining events
-        while not self._queue.empty():
-            try:
-                self._queue.get_nowait()
-            except Empty:
-                break
+        with self._buf_lock:
+            self._buf.clear()
+            self._has_data.clear()
 
     def _generate_events(self) -> None:
         """
         Infinite loop that produces a random sequence of events.
-        Each iteration sleeps for a random interval (exponential distribution)
-        and then decides which type of event to emit.
+
+        Arrival times and event kinds are drawn batch_size at a time with a
+        single vectorized RNG call each. The thread then sleeps until the
+        next flush boundary and enqueues every event that has fallen due as
+        one batch, instead of one sleep and one enqueue per event.
         """
+        rng = np.random.default_rng()
         last_event_time = time.time()
+        last_flush = last_event_time
 
         while self._running:
-            # Determine how long to wait until the next "natural" event
-            sleep_time = random.expovariate(1.0 / self.mean_event_interval)
-            time.sleep(sleep_time)
-            now = time.time()
+            arrivals, groups = self._build_batch(rng, last_event_time)
+            last_event_time = arrivals[-1]
+
+            idx = 0
+            while idx < len(arrivals) and self._running:
+                wake = max(arrivals[idx], last_flush + self.flush_interval)
+                delay = wake - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                last_flush = time.time()
+                end = bisect_right(arrivals, last_flush, lo=idx + 1)
+                due = [ev for group in groups[idx:end] for ev in group]
+                with self._buf_lock:
+                    was_empty = not self._buf
+                    self._buf.extend(due)
+                    if was_empty:
+                        self._has_data.set()
+                idx = end
+
+    def _build_batch(
+        self, rng: np.random.Generator, start: float
+    ) -> Tuple[List[float], List[List[BaseEvent]]]:
+        """
+        Pre-generate the next batch_size arrivals after `start`.
+
+        Returns:
+            Tuple (arrival_times, groups) where groups[i] holds the events
+            emitted at arrival_times[i].
+        """
+        k = self.batch_size
+        gaps = rng.exponential(self.mean_event_interval, k)
+        arrivals = start + np.cumsum(gaps)
+        # Kind per arrival: 0 = idle, 1 = keystroke, 2 = mouse, 3 = focus change
+        thresholds = [self.idle_probability, self.idle_probability + 0.4, self.idle_probability + 0.7]
+        kinds = np.searchsorted(thresholds, rng.random(k), side="right")
+        # One uniform draw per arrival, scaled to the range each kind needs
+        spans = rng.random(k)
+        xs = rng.integers(0, 1921, k)
+        ys = rng.integers(0, 1081, k)
+
+        idle_gap = self.mean_event_interval * 2
+        groups: List[List[BaseEvent]] = []
+        for now, gap, kind, u, x, y in zip(
+            arrivals.tolist(), gaps.tolist(), kinds.tolist(), spans.tolist(), xs.tolist(), ys.tolist()
+        ):
+            group: List[BaseEvent] = []
 
             # --- Idle detection ---
             # If the gap since the last event is significantly larger than the
             # mean interval, treat it as an idle period and emit an IdleEvent.
-            idle_duration = now - last_event_time
-            if idle_duration > self.mean_event_interval * 2:
-                self._queue.put(
-                    IdleEvent(
-                        timestamp=now,
-                        type=EventType.IDLE_PERIOD,
-                        duration=idle_duration,
-                    )
-                )
-            last_event_time = now
-
-            # --- Decide which event to generate ---
-            # Idle event (already emitted above) – now decide among keyboard,
-            # mouse, and focus events.
-
-            # Idle event is a special case – we already emitted it if the gap
-            # was large. For the remaining probability we generate other events.
-            # But we also allow explicit idle events with shorter durations?
-            # For simplicity, we only generate IdleEvent when the gap is large.
-            # The other events are generated with certain probabilities.
-
-            rand = random.random()
-
-            if rand < self.idle_probability:
-                # Explicit idle event (short idle) – emit an IdleEvent with a
-                # small duration (simulates brief pauses).
-                self._queue.put(
-                    IdleEvent(
-                        timestamp=now,
-                        type=EventType.IDLE_PERIOD,
-                        duration=random.uniform(0.5, 2.0),
-                    )
-                )
-            elif rand < self.idle_probability + 0.4:
-                # Keystroke event: generate a press and later a release.
-                press_time = now
-                release_time = press_time + random.uniform(0.05, 0.20)
-                self._queue.put(
-                    KeystrokeEvent(timestamp=press_time, type=EventType.KEY_PRESS)
+            if gap > idle_gap:
+                group.append(IdleEvent(timestamp=now, type=EventType.IDLE_PERIOD, duration=gap))
+
+            if kind == 0:
+                # Explicit idle event (short idle) – duration in [0.5, 2.0)
+                # seconds (simulates brief pauses).
+                group.append(
+                    IdleEvent(timestamp=now, type=EventType.IDLE_PERIOD, duration=0.5 + 1.5 * u)
                 )
-                # Schedule the release event (we put it in the queue immediately
-                # with a future timestamp; the feature extractor will sort by time.)
-                self._queue.put(
-                    KeystrokeEvent(timestamp=release_time, type=EventType.KEY_RELEASE)
+            elif kind == 1:
+                # Keystroke event: a press and a release 50–200 ms later. The
+                # release carries a future timestamp; the feature extractor
+                # sorts by time.
+                group.append(KeystrokeEvent(timestamp=now, type=EventType.KEY_PRESS))
+                group.append(
+                    KeystrokeEvent(timestamp=now + 0.05 + 0.15 * u, type=EventType.KEY_RELEASE)
                 )
-            elif rand < self.idle_probability + 0.7:
+            elif kind == 2:
                 # Mouse movement
-                self._queue.put(
-                    MouseEvent(
-                        timestamp=now,
-                        type=EventType.MOUSE_MOVE,
-                        x=random.randint(0, 1920),
-                        y=random.randint(0, 1080),
-                    )
-                )
+                group.append(MouseEvent(timestamp=now, type=EventType.MOUSE_MOVE, x=x, y=y))
             else:
-                # Focus change event
-                # Emit a focus loss, and after a short interval a focus gain.
-                loss_time = now
-                gain_time = loss_time + random.uniform(0.5, 3.0)
-                self._queue.put(
-                    FocusEvent(
-                        timestamp=loss_time,
-                        type=EventType.FOCUS_LOST,
-                        lost_focus=True,
-                    )
-                )
-                self._queue.put(
-                    FocusEvent(
-                        timestamp=gain_time,
-                        type=EventType.FOCUS_GAINED,
-                        lost_focus=False,
-                    )
+                # Focus change event: a focus loss, and 0.5–3 s later a gain.
+                group.append(FocusEvent(timestamp=now, type=EventType.FOCUS_LOST, lost_focus=True))
+                group.append(
+                    FocusEvent(timestamp=now + 0.5 + 2.5 * u, type=EventType.FOCUS_GAINED, lost_focus=False)
                 )
+            groups.append(group)
+
+        return arrivals.tolist(), groups
 
     def get_events(self, timeout: float = 0.1) -> List[BaseEvent]:
         """
-        Collect all events that have accumulated in the internal queue.
+        Collect all events that have accumulated in the internal buffer.
 
         Args:
-            timeout: Maximum time (seconds) to wait for new events.
-                    Since the generator runs continuously, this method
-                    returns immediately after draining the queue.
+            timeout: Maximum time (seconds) to wait if nothing is buffered.
+                    Returns as soon as any events are available.
 
         Returns:
             List of BaseEvent objects (may be empty).
         """
-        events: List[BaseEvent] = []
-        start = time.time()
-        while (time.time() - start) < timeout:
-            try:
-                event = self._queue.get_nowait()
-                events.append(event)
-            except Empty:
-                time.sleep(0.01)
+        if not self._has_data.wait(timeout):
+            return []
+        with self._buf_lock:
+            events = list(self._buf)
+            self._buf.clear()
+            self._has_data.clear()
         return events
@@ -0,0 +1,24 @@
+# client/jit.py
+"""
+JIT Compatibility Module
+
+Exposes Numba's njit/prange when numba is installed. Without numba the
+decorator is a no-op and prange is plain range, so numeric kernels still
+run (more slowly) as ordinary Python.
+"""
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit (supports bare and called forms)."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+        return decorator
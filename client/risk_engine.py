@@ -6,15 +6,23 @@ risk score using a weighted formula. Applies a moving average to smooth
 short-term fluctuations.
 """
 
+import math
 from collections import deque
-from typing import Deque, Optional
-from client.activity_shift_detector import AnomalyScores
+from typing import Deque, Optional, Tuple
+from client.activity_shift_detector import ActivityShiftDetector, AnomalyScores
+from client.feature_extractor import FeatureVector
+
+# The running window sum is rebuilt exactly (math.fsum) once per this many
+# full windows of evictions, bounding rounding drift at O(1) amortised cost.
+_RESYNC_WINDOWS = 100
 
 
 class RiskEngine:
     def __init__(self, smoothing_window: int = 5):
         self.smoothing_window = smoothing_window
         self._risk_history: Deque[float] = deque(maxlen=smoothing_window)
+        self._risk_sum: float = 0.0  # Running sum of _risk_history
+        self._evictions_until_resync = _RESYNC_WINDOWS * smoothing_window
         self._last_raw_risk: float = 0.0
         self._last_smoothed_risk: float = 0.0
         self.weight_idle_burst = 0.4
@@ -28,13 +36,33 @@ class RiskEngine:
             self.weight_focus_instability * anomaly_scores.focus_instability +
             self.weight_behavioral_drift * anomaly_scores.behavioral_drift
         )
-        raw_risk = max(0.0, min(100.0, raw_risk))
-        
+        return self.push_raw_risk(raw_risk)
+
+    def push_raw_risk(self, raw_risk: float) -> float:
+        """Clamp a weighted raw risk, add it to the history and return the smoothed risk."""
+        raw_risk = 0.0 if raw_risk < 0.0 else (100.0 if raw_risk > 100.0 else raw_risk)
+
         self._last_raw_risk = raw_risk
+        # Keep the running sum in step with the bounded deque: subtract the
+        # value about to be evicted before appending, and periodically
+        # rebuild it so rounding drift cannot accumulate.
+        resync = False
+        if self._risk_history and len(self._risk_history) == self._risk_history.maxlen:
+            self._risk_sum -= self._risk_history[0]
+            self._evictions_until_resync -= 1
+            if self._evictions_until_resync <= 0:
+                self._evictions_until_resync = _RESYNC_WINDOWS * self.smoothing_window
+                resync = True
         self._risk_history.append(raw_risk)
-        
+
         if len(self._risk_history) > 0:
-            smoothed = sum(self._risk_history) / len(self._risk_history)
+            if resync:
+                self._risk_sum = math.fsum(self._risk_history)
+            else:
+                self._risk_sum += raw_risk
+            # Clamp: subtraction residue can leave e.g. -4.9e-16 for an
+            # all-zero window, which the server's ge=0 check would reject.
+            smoothed = min(100.0, max(0.0, self._risk_sum / len(self._risk_history)))
         else:
             smoothed = raw_risk
             
@@ -51,5 +79,37 @@ class RiskEngine:
 
     def reset(self) -> None:
         self._risk_history.clear()
+        self._risk_sum = 0.0
+        self._evictions_until_resync = _RESYNC_WINDOWS * self.smoothing_window
         self._last_raw_risk = 0.0
-        self._last_smoothed_risk = 0.0
\ No newline at end of file
+        self._last_smoothed_risk = 0.0
+
+
+class ActivityShiftRiskPipeline:
+    """
+    Runs an ActivityShiftDetector and a RiskEngine back to back on each
+    feature vector without building an intermediate AnomalyScores object.
+    """
+
+    def __init__(self, detector: ActivityShiftDetector, engine: RiskEngine):
+        self.detector = detector
+        self.engine = engine
+
+    def compute_risk_from_features(
+        self, features: FeatureVector
+    ) -> Tuple[float, Tuple[float, float, float, float]]:
+        """
+        Score a feature vector and fold it into the smoothed risk.
+
+        Returns:
+            Tuple (smoothed_risk, (idle_burst, focus_instability,
+            behavioral_drift, overall)).
+        """
+        breakdown = self.detector.compute_score_tuple(features)
+        engine = self.engine
+        raw_risk = (
+            engine.weight_idle_burst * breakdown[0] +
+            engine.weight_focus_instability * breakdown[1] +
+            engine.weight_behavioral_drift * breakdown[2]
+        )
+        return engine.push_raw_risk(raw_risk), breakdown
\ No newline at end of file
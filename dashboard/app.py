@@ -9,13 +9,14 @@ All data shown is derived from timing metadata only.
 """
 
 import streamlit as st
+from streamlit_autorefresh import st_autorefresh
 import pandas as pd
-import plotly.graph_objects as go
-from sqlalchemy import create_engine, text
+import altair as alt
+from sqlalchemy import create_engine, event, text, TextClause
+from sqlalchemy.pool import QueuePool
 import os
 import sys
-import time
-import json
+from typing import Optional
 from datetime import datetime
 
 # Add project root to path for imports
@@ -52,16 +53,164 @@ if 'refresh_count' not in st.session_state:
     st.session_state.refresh_count = 0
 if 'last_data_hash' not in st.session_state:
     st.session_state.last_data_hash = None
+if 'records' not in st.session_state:
+    st.session_state.records = None
+    st.session_state.records_view = None
+    st.session_state.records_last_id = None
+
+# Per-connection tuning for the dashboard's many small SELECTs: a 20 MB page
+# cache, in-memory temp tables, memory-mapped reads, and waiting out the
+# server's write locks instead of failing. journal_mode/synchronous are
+# writer-side settings (journal_mode is persistent) and cannot be changed
+# through a read-only connection.
+_SQLITE_READ_PRAGMAS = """
+PRAGMA cache_size=-20000;
+PRAGMA temp_store=MEMORY;
+PRAGMA busy_timeout=5000;
+PRAGMA mmap_size=268435456;
+"""
+
+# Same database file as the server (server/database.py): the project root's
+# sentinelx.db unless SENTINELX_DB_PATH points elsewhere
+DB_PATH = os.environ.get(
+    "SENTINELX_DB_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sentinelx.db"),
+)
 
 # Database connection
 @st.cache_resource
 def get_engine():
-    """Create SQLAlchemy engine for SQLite."""
-    db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sentinelx.db")
-    engine_url = f"sqlite:///{db_path}"
-    return create_engine(engine_url, connect_args={"check_same_thread": False})
+    """Create a read-only SQLAlchemy engine for SQLite (the dashboard never writes)."""
+    engine_url = f"sqlite:///file:{DB_PATH}?mode=ro&uri=true"
+    # cache_resource makes the engine a process-wide singleton, so this small
+    # pool keeps the same SQLite handles open across reruns instead of
+    # reopening the .db/-wal/-shm files on every refresh. LIFO checkout hands
+    # a lone viewer the same connection every run, so its statement and page
+    # caches stay warm instead of rotating through the pool.
+    engine = create_engine(
+        engine_url,
+        connect_args={"uri": True, "check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=4,
+        max_overflow=0,
+        pool_use_lifo=True,
+        pool_pre_ping=True,
+        pool_recycle=3600,
+    )
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.executescript(_SQLITE_READ_PRAGMAS)
+        cursor.close()
+
+    return engine
+
+# Alert levels by risk score, lower bound inclusive; below 30 is no alert
+ALERT_BINS = [30, 60, 80, float("inf")]
+ALERT_LABELS = ["🟡 LOW", "🟠 MEDIUM", "🔴 HIGH"]
+ANOMALY_KEYS = ["idle_burst", "focus_instability", "behavioral_drift"]
+
+# Anomaly sub-scores are pulled out of the stored JSON by SQLite, so rows
+# arrive with plain float columns. Malformed JSON yields NULL (shown as 0)
+# rather than failing the whole query.
+RECORD_COLUMNS = "id, timestamp, risk_score, session_id, " + ", ".join(
+    f"json_extract(CASE WHEN json_valid(anomaly_scores) THEN anomaly_scores END, '$.{key}') AS {key}"
+    for key in ANOMALY_KEYS
+)
+
+# Column dtypes applied as the query result is loaded. timestamp stays a
+# Unix float (the datetime column is derived from it); id and risk_score
+# are NOT NULL, so no numeric coercion pass is needed afterwards.
+RECORD_DTYPES = {
+    "id": "int64",
+    "timestamp": "float64",
+    "risk_score": "float64",
+    "session_id": "string",
+    **{key: "float64" for key in ANOMALY_KEYS},
+}
+
+
+@st.cache_resource
+def get_queries() -> tuple[TextClause, dict[tuple[bool, bool], TextClause]]:
+    """
+    SQL statements, built once per process rather than on every rerun
+    (Streamlit re-executes this script's module scope each time).
+
+    Returns:
+        Tuple (sessions_query, record_queries) where record_queries is keyed
+        by (filtered by session, only rows inserted after :last_id).
+    """
+    select = f"SELECT {RECORD_COLUMNS} FROM risk_records "
+    order = "ORDER BY timestamp DESC LIMIT :limit"
+    # The delta variants order by the key they filter on, so SQLite seeks
+    # straight to id > :last_id instead of walking the whole timestamp
+    # index (a refresh rarely fills :limit). The caller re-sorts by timestamp.
+    delta_order = "ORDER BY id DESC LIMIT :limit"
+    record_queries = {
+        (False, False): text(select + order),
+        (True, False): text(select + "WHERE session_id = :session_id " + order),
+        (False, True): text(select + "WHERE id > :last_id " + delta_order),
+        (True, True): text(select + "WHERE session_id = :session_id AND id > :last_id " + delta_order),
+    }
+    sessions_query = text("SELECT DISTINCT session_id FROM risk_records ORDER BY session_id")
+    return sessions_query, record_queries
+
+
+@st.cache_data(ttl=2, show_spinner=False)
+def fetch_dashboard_data(
+    session_id: str, limit: int, last_id: Optional[int] = None
+) -> tuple[list[str], pd.DataFrame]:
+    """
+    Distinct session IDs and the most recent risk records (newest first,
+    optionally for one session), read back-to-back over one connection
+    checkout. With `last_id`, only the most recently inserted records after
+    that row id are returned, in insertion order (keyed on row id, not
+    timestamp, so a late bulk batch carrying older timestamps is still
+    picked up). Cached for the default refresh interval; each caller gets
+    its own copy.
+    """
+    sessions_query, record_queries = get_queries()
+    params = {"limit": limit}
+    if session_id != "All":
+        params["session_id"] = session_id
+    if last_id is not None:
+        params["last_id"] = last_id
+    query = record_queries[session_id != "All", last_id is not None]
+    with get_engine().connect() as conn:
+        result = conn.execute(sessions_query)
+        session_list = [row[0] for row in result.fetchall()]
+        df = pd.read_sql_query(query, conn, params=params, dtype=RECORD_DTYPES)
+    return session_list, df
+
+
+@st.cache_resource
+def get_threshold_layer() -> alt.LayerChart:
+    """
+    Dashed Low/Medium/High threshold rules with their labels, built once per
+    process. Each run layers the risk line for its own data on top.
+    """
+    thresholds = pd.DataFrame({"risk_score": [30, 60, 80], "level": ["Low", "Medium", "High"]})
+    rules = alt.Chart(thresholds).mark_rule(strokeDash=[4, 4]).encode(
+        y="risk_score:Q",
+        color=alt.Color(
+            "level:N",
+            scale=alt.Scale(domain=["Low", "Medium", "High"], range=["green", "orange", "red"]),
+            legend=None,
+        ),
+    )
+    labels = rules.mark_text(align="left", dx=4, dy=-6).encode(text="level:N")
+    return rules + labels
+
+
+def build_risk_chart(df: pd.DataFrame) -> alt.LayerChart:
+    """Risk score line (with points) over the cached threshold layer."""
+    line = alt.Chart(df[['datetime', 'risk_score']]).mark_line(point=True, color='#1f77b4').encode(
+        x=alt.X("datetime:T", title="Time"),
+        y=alt.Y("risk_score:Q", title="Risk Score (0–100)", scale=alt.Scale(domain=[0, 100])),
+    )
+    return alt.layer(line, get_threshold_layer()).properties(title="Risk Score Over Time", height=400)
 
-engine = get_engine()
 
 # Sidebar controls
 with st.sidebar:
@@ -70,22 +219,57 @@ with st.sidebar:
     max_records = st.slider("Number of records to display", 10, 100, 50)
     
     st.header("Session Selection")
-    # Get all distinct session IDs
+    # The filter's value is read from its widget key before the selectbox is
+    # drawn, so the session list and the records come from a single fetch.
+    selected_session = st.session_state.get("session_filter", "All")
+    # Records shown are kept across reruns. While the filter and record
+    # count are unchanged, only rows inserted since the last fetch are
+    # pulled and merged in by timestamp; otherwise the window is fetched in
+    # full.
+    view = (selected_session, max_records)
+    last_id = None
+    if st.session_state.records_view == view:
+        last_id = st.session_state.records_last_id
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text("SELECT DISTINCT session_id FROM risk_records ORDER BY session_id"))
-            session_list = [row[0] for row in result.fetchall()]
-        selected_session = st.selectbox("Filter by session ID", ["All"] + session_list if session_list else ["All"])
-    except Exception:
-        selected_session = "All"
+        session_list, df = fetch_dashboard_data(selected_session, max_records, last_id)
+        if last_id is not None and len(df) == max_records:
+            # A full delta may have cut off new rows that belong in the
+            # window (it is ordered by id, not timestamp); refetch in full.
+            last_id = None
+            session_list, df = fetch_dashboard_data(selected_session, max_records)
+        # ids only grow, so anything fetched is past the stored watermark
+        new_last_id = int(df['id'].max()) if not df.empty else last_id
+        if last_id is not None:
+            if df.empty:
+                df = st.session_state.records
+            else:
+                df = (
+                    pd.concat([df, st.session_state.records], ignore_index=True)
+                    .sort_values('timestamp', ascending=False, kind='stable', ignore_index=True)
+                    .head(max_records)
+                )
+        st.session_state.records = df
+        st.session_state.records_view = view
+        st.session_state.records_last_id = new_last_id
+        fetch_error = None
+    except Exception as e:
+        session_list, df, fetch_error = [], None, e
+    session_options = ["All"] + session_list
+    if fetch_error is not None and selected_session not in session_options:
+        # The session list is unknown this run; keep the user's choice
+        session_options.append(selected_session)
+    elif selected_session not in session_options:
+        st.session_state.session_filter = "All"
+    selected_session = st.selectbox("Filter by session ID", session_options, key="session_filter")
     
     st.markdown("---")
     st.markdown("**System Info**")
-    st.markdown(f"Database: `sentinelx.db`")
+    st.markdown(f"Database: `{os.path.basename(DB_PATH)}`")
     
     # Manual refresh button
     if st.button("🔄 Manual Refresh"):
         st.session_state.refresh_count += 1
+        st.session_state.records_view = None   # force a full fetch
         st.rerun()
 
 # Main dashboard layout
@@ -96,131 +280,97 @@ risk_graph_placeholder = col1.empty()
 alert_placeholder = col2.empty()
 summary_placeholder = st.empty()
 
-# Auto-refresh logic
-time.sleep(0.1)
-
 try:
-    # Build query
-    if selected_session != "All":
-        query = text("SELECT * FROM risk_records WHERE session_id = :session_id ORDER BY timestamp DESC LIMIT :limit")
-        params = {"session_id": selected_session, "limit": max_records}
-    else:
-        query = text("SELECT * FROM risk_records ORDER BY timestamp DESC LIMIT :limit")
-        params = {"limit": max_records}
-    
-    # Fetch latest data
-    with engine.connect() as conn:
-        result = conn.execute(query, params)
-        rows = result.fetchall()
-        if rows:
-            # Convert to DataFrame with explicit dtypes
-            df = pd.DataFrame(rows, columns=result.keys())
-            # Ensure risk_score is float
-            df['risk_score'] = pd.to_numeric(df['risk_score'], errors='coerce').fillna(0.0)
-        else:
-            df = pd.DataFrame()
+    # Surface a failed fetch through the error handler below
+    if fetch_error is not None:
+        raise fetch_error
     
     if df.empty:
         risk_graph_placeholder.info("No risk records found. Waiting for data...")
         alert_placeholder.info("No alerts yet.")
         summary_placeholder.info("No session summary available.")
     else:
-        # Convert timestamp column to datetime
-        df['datetime'] = pd.to_datetime(df['timestamp'], unit='s')
-        
-        # --- Live Risk Graph ---
-        fig = go.Figure()
-        
-        fig.add_trace(go.Scatter(
-            x=df['datetime'],
-            y=df['risk_score'],
-            mode='lines+markers',
-            name='Risk Score',
-            line=dict(color='#1f77b4', width=2),
-            marker=dict(size=6)
-        ))
-        
-        # Add threshold lines
-        fig.add_hline(y=30, line_dash="dash", line_color="green", annotation_text="Low")
-        fig.add_hline(y=60, line_dash="dash", line_color="orange", annotation_text="Medium")
-        fig.add_hline(y=80, line_dash="dash", line_color="red", annotation_text="High")
-        
-        fig.update_layout(
-            title="Risk Score Over Time",
-            xaxis_title="Time",
-            yaxis_title="Risk Score (0–100)",
-            yaxis=dict(range=[0, 100]),
-            height=400,
-            margin=dict(l=0, r=0, t=40, b=0)
-        )
-        
-        # FIXED: Use width='stretch' instead of use_container_width
-        risk_graph_placeholder.plotly_chart(
-            fig, 
-            width='stretch',
-            key=f"risk_chart_{st.session_state.refresh_count}_{len(df)}"
-        )
-        
-        # --- Alert Log ---
-        alerts = []
-        for _, row in df.iterrows():
-            risk = row['risk_score']
-            if risk >= 80:
-                level = "🔴 HIGH"
-            elif risk >= 60:
-                level = "🟠 MEDIUM"
-            elif risk >= 30:
-                level = "🟡 LOW"
+        # Cheap fingerprint of the fetched window (ids only grow, so any
+        # newly merged row raises the max id). When it
+        # matches the previous run, the stored chart, alert text and
+        # summary are re-emitted as-is instead of being rebuilt. (st.stop()
+        # is not used: Streamlit would clear the elements not redrawn.)
+        data_hash = (selected_session, len(df), int(df['id'].max()))
+        if data_hash != st.session_state.last_data_hash:
+            # Convert timestamp column to datetime
+            df = df.assign(datetime=pd.to_datetime(df['timestamp'], unit='s'))
+            
+            # --- Live Risk Graph ---
+            risk_chart = build_risk_chart(df)
+            
+            # --- Alert Log ---
+            # Level per record ([30, 60) LOW, [60, 80) MEDIUM, 80+ HIGH); records
+            # below 30 get no level and raise no alert. Only the 10 newest alerts
+            # are shown, so only those have their anomaly scores parsed.
+            levels = pd.cut(df['risk_score'], bins=ALERT_BINS, labels=ALERT_LABELS, right=False)
+            alert_df = df[levels.notna()].head(10)
+            alerts = []
+            if not alert_df.empty:
+                scores = alert_df[ANOMALY_KEYS].fillna(0.0)
+                alerts = [
+                    f"**{level}** Risk: {risk:.1f}  \nSession: {session[:8]}...  \nAnomalies: I:{idle:.0f} F:{focus:.0f} D:{drift:.0f}  \nTime: {when}"
+                    for level, risk, session, idle, focus, drift, when in zip(
+                        levels[alert_df.index].to_numpy(),
+                        alert_df['risk_score'].to_numpy(),
+                        alert_df['session_id'].to_numpy(),
+                        *scores.to_numpy().T,
+                        alert_df['datetime'].dt.strftime('%H:%M:%S').to_numpy(),
+                    )
+                ]
+            
+            if alerts:
+                alert_markdown = "### 🚨 Alert Log\n" + "\n---\n".join(alerts)
+            else:
+                alert_markdown = "### ✅ No active alerts"
+            
+            # --- Session Summary - FIXED: Convert values to strings to avoid Arrow serialization issues ---
+            if selected_session != "All":
+                session_df = df[df['session_id'] == selected_session]
             else:
-                continue  # no alert
+                session_df = df
             
-            # Parse anomaly scores (JSON stored as string)
-            try:
-                scores = json.loads(row['anomaly_scores'])
-                idle = scores.get('idle_burst', 0)
-                focus = scores.get('focus_instability', 0)
-                drift = scores.get('behavioral_drift', 0)
-            except:
-                idle = focus = drift = 0
+            # Ensure we have numeric values
+            if not session_df.empty:
+                avg_risk = session_df['risk_score'].mean()
+                max_risk = session_df['risk_score'].max()
+                min_risk = session_df['risk_score'].min()
+                latest_risk = session_df.iloc[0]['risk_score']
+            else:
+                avg_risk = max_risk = min_risk = latest_risk = 0.0
             
-            alert_text = f"**{level}** Risk: {risk:.1f}  \nSession: {row['session_id'][:8]}...  \nAnomalies: I:{idle:.0f} F:{focus:.0f} D:{drift:.0f}  \nTime: {row['datetime'].strftime('%H:%M:%S')}"
-            alerts.append(alert_text)
-        
-        if alerts:
-            alert_placeholder.markdown("### 🚨 Alert Log\n" + "\n---\n".join(alerts[:10]))
-        else:
-            alert_placeholder.markdown("### ✅ No active alerts")
-        
-        # --- Session Summary - FIXED: Convert values to strings to avoid Arrow serialization issues ---
-        if selected_session != "All":
-            session_df = df[df['session_id'] == selected_session]
-        else:
-            session_df = df
-        
-        # Ensure we have numeric values
-        if not session_df.empty:
-            avg_risk = session_df['risk_score'].mean()
-            max_risk = session_df['risk_score'].max()
-            min_risk = session_df['risk_score'].min()
-            latest_risk = session_df.iloc[0]['risk_score']
+            # FIXED: Create summary with ALL values as strings to avoid Arrow type conversion issues
+            summary = {
+                "Total risk records": str(len(session_df)),
+                "Average risk": f"{avg_risk:.1f}",
+                "Max risk": f"{max_risk:.1f}",
+                "Min risk": f"{min_risk:.1f}",
+                "Latest risk": f"{latest_risk:.1f}",
+            }
+            
+            # Create summary DataFrame with explicit string type
+            summary_df = pd.DataFrame(list(summary.items()), columns=["Metric", "Value"])
+            summary_df['Value'] = summary_df['Value'].astype(str)
+            
+            st.session_state.rendered = (risk_chart, alert_markdown, summary_df)
+            st.session_state.last_data_hash = data_hash
         else:
-            avg_risk = max_risk = min_risk = latest_risk = 0.0
-        
-        # FIXED: Create summary with ALL values as strings to avoid Arrow type conversion issues
-        summary = {
-            "Total risk records": str(len(session_df)),
-            "Average risk": f"{avg_risk:.1f}",
-            "Max risk": f"{max_risk:.1f}",
-            "Min risk": f"{min_risk:.1f}",
-            "Latest risk": f"{latest_risk:.1f}",
-        }
-        
-        # Create summary DataFrame with explicit string type
-        summary_df = pd.DataFrame(list(summary.items()), columns=["Metric", "Value"])
-        summary_df['Value'] = summary_df['Value'].astype(str)
+            risk_chart, alert_markdown, summary_df = st.session_state.rendered
         
+        # Streamlit 1.29's altair_chart takes no width/key arguments
+        risk_graph_placeholder.altair_chart(risk_chart, use_container_width=True)
+        alert_placeholder.markdown(alert_markdown)
         summary_placeholder.markdown("### 📊 Session Summary")
         summary_placeholder.table(summary_df)
         
 except Exception as e:
-    st.error(f"Dashboard error: {str(e)}")
\ No newline at end of file
+    st.error(f"Dashboard error: {str(e)}")
+
+# Auto-refresh: a browser-side timer triggers the rerun, so the script
+# returns straight away and widget changes apply immediately instead of
+# queueing behind a server-side sleep
+st_autorefresh(interval=refresh_rate * 1000, key="auto_refresh")
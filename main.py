@@ -24,18 +24,17 @@ print(f"[Main] Project root: {PROJECT_ROOT}")
 
 import multiprocessing
 import time
-import uuid
-import requests
-from datetime import datetime
 
 # ----------------------------------------------------------------------
 # 1. Database Initialization
 # ----------------------------------------------------------------------
 def init_database():
     """Create database tables before starting the server."""
-    from server.database import init_db
+    from server.database import init_db, engine
     print("[Main] Initializing database...")
     init_db()
+    # Close the pooled SQLite connection so forked children don't inherit it
+    engine.dispose()
     print("[Main] Database ready.")
 
 # ----------------------------------------------------------------------
@@ -98,7 +97,7 @@ def run_simulation():
     - Build baseline during first 3 minutes
     - Detect activity shifts
     - Compute risk score
-    - POST to backend every 10 seconds (or after each risk update)
+    - POST the buffered risk readings to the backend every 10 seconds
     """
     # ============ CRITICAL: Add path fix at the VERY TOP of the function ============
     import os
@@ -117,6 +116,7 @@ def run_simulation():
     
     import time
     import uuid
+    from collections import deque
     import requests
     
     # Now these imports should work
@@ -125,8 +125,7 @@ def run_simulation():
         from client.feature_extractor import FeatureExtractor
         from client.baseline_builder import BaselineBuilder
         from client.activity_shift_detector import ActivityShiftDetector
-        from client.risk_engine import RiskEngine
-        from shared.models import RiskData, AnomalyScores
+        from client.risk_engine import RiskEngine, ActivityShiftRiskPipeline
         print("[Client] All modules imported successfully")
     except ImportError as e:
         print(f"[Client] Import error: {e}")
@@ -152,6 +151,7 @@ def run_simulation():
     baseline_builder = BaselineBuilder(calibration_duration=180.0)  # 3 minutes
     detector = ActivityShiftDetector()
     risk_engine = RiskEngine(smoothing_window=5)
+    pipeline = ActivityShiftRiskPipeline(detector, risk_engine)
 
     # Start the event listener
     listener.start()
@@ -163,83 +163,134 @@ def run_simulation():
     # Main loop: collect events, compute features, update baseline, detect anomalies, compute risk
     last_risk_send_time = 0
     risk_send_interval = 10.0  # seconds
+    feature_interval = 2.0     # seconds between feature/risk computations
+    next_feature_time = time.time()
+
+    # One keep-alive HTTP session for all sends, so each POST reuses the
+    # same connection instead of opening a new one
+    http = requests.Session()
+    http.headers["Content-Type"] = "application/json"
+
+    # Request bodies are encoded with orjson when it is installed
+    try:
+        from orjson import dumps as json_dumps
+    except ImportError:
+        import json
+
+        def json_dumps(obj):
+            return json.dumps(obj).encode()
+
+    # Risk readings computed since the last send, oldest first. Capped so an
+    # unreachable server can't make it grow without bound: past the cap the
+    # oldest readings are dropped (~10 minutes of readings at one per tick).
+    max_pending = 300
+    pending = deque(maxlen=max_pending)
 
     try:
         while True:
-            # 1. Get events from listener
-            events = listener.get_events(timeout=1.0)
+            # 1. Sleep out the rest of the feature interval, then drain
+            #    everything the listener buffered meanwhile in one call: one
+            #    wake-up per tick. Ingest is O(1) per event, so nothing is
+            #    gained by waking on every listener flush to add events early.
+            delay = next_feature_time - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            events = listener.get_events(timeout=0)
             for event in events:
                 extractor.add_event(event)
 
+            now = time.time()
+            next_feature_time = now + feature_interval
+
+            # Still calibrating and nothing arrived since the last tick: skip
+            # the feature/baseline pass (nothing to score yet either)
+            if not events and not baseline_builder.is_calibrated:
+                continue
+
             # 2. Compute features from current window
             features = extractor.compute_features()
 
             # 3. Update baseline builder (calibration phase)
-            baseline_builder.update(features, features.window_end)
+            if detector.baseline is None:
+                baseline_builder.update(features, features.window_end)
 
-            # 4. Once calibrated, set baseline in detector
-            if baseline_builder.is_calibrated and detector.baseline is None:
-                detector.baseline = baseline_builder.baseline
-                print(f"[Client] Baseline calibrated: {detector.baseline}")
+                # 4. Once calibrated, set baseline in detector
+                if baseline_builder.is_calibrated:
+                    detector.baseline = baseline_builder.baseline
+                    print(f"[Client] Baseline calibrated: {detector.baseline}")
 
             # 5. If baseline is ready, detect anomalies and compute risk
             if detector.baseline is not None:
-                anomaly_scores = detector.compute_scores(features)
-                risk_score = risk_engine.compute_risk(anomaly_scores)
+                risk_score, (idle_burst, focus_instability, behavioral_drift, overall) = \
+                    pipeline.compute_risk_from_features(features)
+
+                # Record every reading; the buffer is sent in one bulk POST.
+                # The payload is built directly in the RiskData JSON shape –
+                # the server validates it on receipt.
+                pending.append({
+                    "timestamp": now,
+                    "risk_score": risk_score,
+                    "anomaly_scores": {
+                        "idle_burst": idle_burst,
+                        "focus_instability": focus_instability,
+                        "behavioral_drift": behavioral_drift,
+                        "overall": overall,
+                    },
+                    "session_id": session_id,
+                    "source": "simulation",
+                })
 
-                # Send risk data periodically
-                now = time.time()
+                # Send buffered risk data periodically
                 if now - last_risk_send_time >= risk_send_interval:
-                    # Prepare payload
-                    payload = RiskData(
-                        timestamp=now,
-                        risk_score=risk_score,
-                        anomaly_scores=AnomalyScores(
-                            idle_burst=anomaly_scores.idle_burst,
-                            focus_instability=anomaly_scores.focus_instability,
-                            behavioral_drift=anomaly_scores.behavioral_drift,
-                            overall=anomaly_scores.overall
-                        ),
-                        session_id=session_id,
-                        source="simulation"
-                    )
                     # POST to backend
                     try:
-                        # Handle Pydantic v1 vs v2 serialization
-                        if hasattr(payload, "model_dump"):
-                            payload_dict = payload.model_dump()
-                        else:
-                            payload_dict = payload.dict()
-                            
-                        resp = requests.post(
-                            "http://localhost:8000/risk",
-                            json=payload_dict,
+                        resp = http.post(
+                            "http://localhost:8000/risk/bulk",
+                            data=json_dumps(list(pending)),
                             timeout=2.0
                         )
                         if resp.status_code == 200:
-                            print(f"[Client] Risk sent: {risk_score:.1f}")
+                            # The server stores every valid reading and
+                            # reports the ones it rejected; those would fail
+                            # again, so the whole batch is done with.
+                            result = resp.json()
+                            print(f"[Client] Risk sent: {risk_score:.1f} "
+                                  f"({result['stored']}/{len(pending)} readings stored)")
+                            for rejected in result["rejected"]:
+                                print(f"[Client] Reading {rejected['index']} rejected: {rejected['reason']}")
+                            pending.clear()
+                            last_risk_send_time = now
+                        elif resp.status_code in (400, 422):
+                            # The request body itself is malformed; resending
+                            # it would fail the same way, so drop it.
+                            print(f"[Client] Risk batch rejected ({resp.status_code}), "
+                                  f"dropping {len(pending)} readings: {resp.text}")
+                            pending.clear()
                             last_risk_send_time = now
                         else:
+                            # Anything else (5xx, 404 from an older server,
+                            # 413, 429) says nothing about the readings: keep
+                            # the batch and retry
                             print(f"[Client] Failed to send risk: {resp.status_code}")
                     except Exception as e:
                         print(f"[Client] Error sending risk: {e}")
 
-            # Sleep a bit to avoid busy loop
-            time.sleep(2.0)
-
     except KeyboardInterrupt:
         print("[Client] Stopping...")
     finally:
         listener.stop()
+        http.close()
         print("[Client] Shutdown complete.")
 
 # ----------------------------------------------------------------------
 # 5. Main Orchestrator
 # ----------------------------------------------------------------------
 if __name__ == "__main__":
-    # Set multiprocessing start method
+    # Set multiprocessing start method: on Linux, fork lets the children share
+    # the parent's already-imported modules copy-on-write instead of
+    # re-importing everything in a fresh interpreter
     try:
-        multiprocessing.set_start_method("spawn", force=True)
+        multiprocessing.set_start_method("fork" if sys.platform == "linux" else "spawn", force=True)
     except RuntimeError:
         pass  # Already set
 
@@ -2,16 +2,22 @@
 """
 FastAPI Backend API Module
 
-Exposes a single REST endpoint POST /risk which accepts a risk score and
+Exposes a REST endpoint POST /risk which accepts a risk score and
 metadata, performs lightweight validation, and stores the record in SQLite.
+POST /risk/bulk does the same for a batch of records in one transaction,
+storing the valid ones and reporting the rest.
 CORS is enabled to allow requests from the Streamlit dashboard.
 """
 
+from typing import Any, Dict, List
+
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
+from pydantic import ValidationError
 
-from shared.models import RiskData, RiskResponse
+from shared.models import RejectedRecord, RiskBulkResponse, RiskData, RiskResponse
 from server.database import SessionLocal, engine, Base, RiskRecord
 from server.anomaly_validator import AnomalyValidator
 
@@ -42,7 +48,7 @@ def get_db():
 
 
 @app.post("/risk", response_model=RiskResponse)
-async def receive_risk(payload: RiskData, db: Session = Depends(get_db)):
+def receive_risk(payload: RiskData, db: Session = Depends(get_db)):
     """
     Accept a risk score and associated metadata.
 
@@ -68,8 +74,7 @@ async def receive_risk(payload: RiskData, db: Session = Depends(get_db)):
         validated=True
     )
     db.add(record)
-    db.commit()
-    db.refresh(record)
+    db.commit()  # flushes the INSERT, which assigns record.id
 
     return RiskResponse(
         received=True,
@@ -78,6 +83,58 @@ async def receive_risk(payload: RiskData, db: Session = Depends(get_db)):
     )
 
 
+@app.post("/risk/bulk", response_model=RiskBulkResponse)
+def receive_risk_bulk(records: List[Dict[str, Any]], db: Session = Depends(get_db)):
+    """
+    Accept a batch of risk scores (e.g. every reading a client computed
+    since its last send).
+
+    Each record is checked on its own (schema, then statistical rules), so
+    one bad reading does not cost the rest of the batch. The valid records
+    are stored with a single executemany INSERT and one commit; the others
+    are returned by index with the reason they were rejected.
+    """
+    payloads = []
+    rejected = []
+    for i, record in enumerate(records):
+        try:
+            payload = RiskData.model_validate(record)
+        except ValidationError as e:
+            reason = "; ".join(
+                f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+            )
+            rejected.append(RejectedRecord(index=i, reason=reason))
+            continue
+        is_valid, reason = validator.validate(payload)
+        if not is_valid:
+            rejected.append(RejectedRecord(index=i, reason=reason))
+            continue
+        payloads.append(payload)
+
+    if payloads:
+        db.execute(
+            insert(RiskRecord),
+            [
+                {
+                    "timestamp": payload.timestamp,
+                    "risk_score": payload.risk_score,
+                    "anomaly_scores": payload.anomaly_scores.model_dump_json(),  # store as JSON
+                    "session_id": payload.session_id,
+                    "validated": True,
+                }
+                for payload in payloads
+            ],
+        )
+        db.commit()
+
+    return RiskBulkResponse(
+        received=True,
+        stored=len(payloads),
+        rejected=rejected,
+        message=f"{len(payloads)} risk records stored, {len(rejected)} rejected"
+    )
+
+
 @app.get("/health")
 async def health_check():
     """Simple health endpoint."""
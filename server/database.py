@@ -12,24 +12,52 @@ does not identify the user.
 """
 
 import os
-from sqlalchemy import create_engine, Column, Integer, Float, String, DateTime, Boolean, Text
+from sqlalchemy import create_engine, event, Column, Integer, Float, String, DateTime, Boolean, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from datetime import datetime
 
-# Determine database path – store in project root
+# Determine database path – store in project root (SENTINELX_DB_PATH
+# overrides it, e.g. to point tests at a scratch database)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DB_PATH = os.path.join(BASE_DIR, "sentinelx.db")
+DB_PATH = os.environ.get("SENTINELX_DB_PATH", os.path.join(BASE_DIR, "sentinelx.db"))
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{DB_PATH}"
 
-# SQLite engine with necessary settings for concurrency and foreign keys
+# SQLite allows one writer at a time, so the server writes through a single
+# pooled connection: WAL journal (readers such as the dashboard's read-only
+# pool never wait on the writer), NORMAL sync (durable at each checkpoint,
+# not each commit). Request handlers are sync, so a request waiting for the
+# connection waits in FastAPI's threadpool, not on the event loop.
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},  # Allow FastAPI to use same thread
+    pool_size=1,
+    max_overflow=0,
     echo=False  # Set to True for SQL logging
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@event.listens_for(engine, "connect")
+def _configure_writer(dbapi_connection, connection_record):
+    # Let SQLAlchemy emit BEGIN itself (see _begin_immediate) rather than
+    # pysqlite's deferred BEGIN before the first write
+    dbapi_connection.isolation_level = None
+    cursor = dbapi_connection.cursor()
+    cursor.executescript("PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA busy_timeout=5000;")
+    cursor.close()
+
+
+@event.listens_for(engine, "begin")
+def _begin_immediate(conn):
+    # Take the write lock when the transaction starts, so a busy database is
+    # waited out (busy_timeout) up front instead of failing mid-transaction
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+# expire_on_commit=False: attributes (e.g. a new record's id) stay readable
+# after commit without opening another write transaction to reload them, so
+# the connection goes back to the pool as soon as the commit finishes.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 Base = declarative_base()
 
@@ -52,9 +80,18 @@ class RiskRecord(Base):
         return f"<RiskRecord id={self.id} session={self.session_id} risk={self.risk_score:.1f}>"
 
 
+# Serves the dashboard's per-session "newest N records" query: SQLite walks
+# the index in order and stops at LIMIT instead of sorting the session's rows.
+# (The unfiltered query already walks ix_risk_records_timestamp backwards.)
+Index("idx_risk_session_ts", RiskRecord.session_id, RiskRecord.timestamp.desc())
+
+
 def init_db():
-    """Create database tables if they don't exist."""
+    """Create database tables and indexes if they don't exist."""
     Base.metadata.create_all(bind=engine)
+    # create_all skips the indexes of tables that already exist
+    for index in RiskRecord.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
 
 
 def get_session_summary(db: Session, session_id: str):
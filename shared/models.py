@@ -13,7 +13,7 @@ These models are used for:
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 
 
@@ -94,3 +94,17 @@ class RiskResponse(BaseModel):
     received: bool
     record_id: Optional[int] = None
     message: str
+
+
+class RejectedRecord(BaseModel):
+    """A record of a POST /risk/bulk batch that was not stored."""
+    index: int                         # Position in the submitted batch
+    reason: str
+
+
+class RiskBulkResponse(BaseModel):
+    """Response from the server after storing a batch of risk data."""
+    received: bool
+    stored: int                        # Number of records written
+    rejected: List[RejectedRecord] = Field(default_factory=list)
+    message: str
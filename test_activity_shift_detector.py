@@ -0,0 +1,78 @@
+# test_activity_shift_detector.py
+"""
+Checks that batch scoring (numba kernel and numpy fallback) agrees with
+the scalar compute_score_tuple path.
+Run directly (python test_activity_shift_detector.py) or via pytest.
+"""
+
+import importlib
+import random
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.pop("SENTINALX_TEST", None)
+
+import client.jit
+import client.activity_shift_detector as detector_module
+from client.baseline_builder import BaselineProfile
+from client.feature_extractor import FeatureVector
+
+
+def random_cases(seed: int, count: int = 300):
+    """(baseline, features) pairs, including zero baseline rates, empty
+    windows and values straddling each rule's threshold."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        baseline = BaselineProfile(
+            avg_typing_speed=rng.choice([0.0, rng.uniform(20.0, 300.0)]),
+            avg_idle_duration=rng.choice([0.0, rng.uniform(0.5, 10.0)]),
+            avg_focus_rate=rng.choice([0.0, rng.uniform(0.1, 5.0)]),
+        )
+        features = []
+        for _ in range(rng.randint(1, 40)):
+            start = rng.uniform(0.0, 1000.0)
+            features.append(FeatureVector(
+                avg_typing_speed=baseline.avg_typing_speed * rng.uniform(0.0, 3.0) + rng.uniform(0.0, 5.0),
+                avg_idle_duration=baseline.avg_idle_duration * rng.uniform(0.0, 2.0),
+                focus_loss_count=rng.randint(0, 12),
+                window_start=start,
+                window_end=start + rng.choice([0.0, rng.uniform(1.0, 60.0)]),
+            ))
+        yield baseline, features
+
+
+def assert_batch_matches_scalar(module) -> None:
+    for baseline, features in random_cases(seed=0):
+        detector = module.ActivityShiftDetector(baseline)
+        batch = detector.compute_scores_batch(features)
+        for i, fv in enumerate(features):
+            expected = detector.compute_score_tuple(fv)
+            actual = (batch.idle_burst[i], batch.focus_instability[i],
+                      batch.behavioral_drift[i], batch.overall[i])
+            for e, a in zip(expected, actual):
+                assert abs(e - a) < 1e-9, (baseline, fv, expected, actual)
+
+
+def test_batch_matches_scalar():
+    """Batch scores with whichever kernel this environment selects."""
+    assert_batch_matches_scalar(detector_module)
+
+
+def test_numpy_fallback_matches_scalar():
+    """Batch scores with the numpy kernel used when numba is not installed."""
+    numba_available = client.jit.NUMBA_AVAILABLE
+    client.jit.NUMBA_AVAILABLE = False
+    try:
+        assert_batch_matches_scalar(importlib.reload(detector_module))
+    finally:
+        client.jit.NUMBA_AVAILABLE = numba_available
+        importlib.reload(detector_module)
+
+
+if __name__ == "__main__":
+    print("🧪 Testing ActivityShiftDetector batch scoring...")
+    test_batch_matches_scalar()
+    kernel = "numba" if client.jit.NUMBA_AVAILABLE else "numpy"
+    print(f"   ✅ Batch ({kernel} kernel) matches scalar scores")
+    test_numpy_fallback_matches_scalar()
+    print("   ✅ Batch (numpy fallback) matches scalar scores")
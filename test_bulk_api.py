@@ -0,0 +1,124 @@
+# test_bulk_api.py
+"""
+Checks for the POST /risk and /risk/bulk endpoints.
+Runs the FastAPI app in-process against a scratch SQLite database (the
+project's sentinelx.db is never touched). Run directly
+(python test_bulk_api.py) or via pytest.
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Must be set before server.database is imported
+_SCRATCH_DIR = tempfile.mkdtemp(prefix="sentinelx-test-")
+os.environ["SENTINELX_DB_PATH"] = os.path.join(_SCRATCH_DIR, "sentinelx.db")
+
+import httpx
+from fastapi.testclient import TestClient
+
+from server.database import DB_PATH, init_db
+from server.api import app
+
+init_db()
+client = TestClient(app)
+
+
+def make_payload(risk_score: float, session_id: str, **scores) -> dict:
+    anomaly_scores = {"idle_burst": 0.0, "focus_instability": 0.0, "behavioral_drift": 0.0, "overall": 0.0}
+    anomaly_scores.update(scores)
+    return {
+        "timestamp": time.time(),
+        "risk_score": risk_score,
+        "anomaly_scores": anomaly_scores,
+        "session_id": session_id,
+        "source": "test",
+    }
+
+
+def stored_scores(session_id: str) -> list:
+    with sqlite3.connect(DB_PATH) as conn:
+        rows = conn.execute(
+            "SELECT risk_score FROM risk_records WHERE session_id = ? ORDER BY id", (session_id,)
+        ).fetchall()
+    return [row[0] for row in rows]
+
+
+def test_bulk_stores_every_record():
+    batch = [make_payload(score, "bulk-ok", idle_burst=10.0) for score in (10.0, 20.0, 30.0)]
+    resp = client.post("/risk/bulk", json=batch)
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["received"] is True
+    assert resp.json()["stored"] == 3 and resp.json()["rejected"] == []
+    assert stored_scores("bulk-ok") == [10.0, 20.0, 30.0]
+
+
+def test_bulk_keeps_valid_records_around_invalid_one():
+    # Risk 0 with non-zero sub-scores fails AnomalyValidator's consistency rule
+    batch = [
+        make_payload(10.0, "bulk-bad", idle_burst=10.0),
+        make_payload(0.0, "bulk-bad", idle_burst=5.0),
+        make_payload(20.0, "bulk-bad", idle_burst=10.0),
+    ]
+    resp = client.post("/risk/bulk", json=batch)
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    assert body["stored"] == 2
+    assert [r["index"] for r in body["rejected"]] == [1]
+    assert stored_scores("bulk-bad") == [10.0, 20.0]
+
+
+def test_bulk_keeps_valid_records_around_schema_error():
+    batch = [make_payload(10.0, "bulk-schema"), make_payload(-1e-16, "bulk-schema"), {"session_id": "bulk-schema"}]
+    resp = client.post("/risk/bulk", json=batch)
+    assert resp.status_code == 200, resp.text
+    rejected = resp.json()["rejected"]
+    assert [r["index"] for r in rejected] == [1, 2]
+    assert rejected[0]["reason"].startswith("risk_score:")
+    assert stored_scores("bulk-schema") == [10.0]
+
+
+def test_bulk_rejects_non_list_body():
+    resp = client.post("/risk/bulk", json=make_payload(10.0, "bulk-body"))
+    assert resp.status_code == 422, resp.text
+    assert stored_scores("bulk-body") == []
+
+
+def test_bulk_accepts_empty_batch():
+    resp = client.post("/risk/bulk", json=[])
+    assert resp.status_code == 200, resp.text
+
+
+def test_overlapping_requests_all_succeed():
+    """Concurrent /risk and /risk/bulk calls share the single writer connection."""
+    async def post_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            single = [ac.post("/risk", json=make_payload(5.0, "overlap")) for _ in range(20)]
+            bulk = [ac.post("/risk/bulk", json=[make_payload(5.0, "overlap")] * 3) for _ in range(5)]
+            return await asyncio.wait_for(asyncio.gather(*single, *bulk), timeout=20)
+
+    responses = asyncio.run(post_all())
+    assert [r.status_code for r in responses] == [200] * 25
+    assert len(stored_scores("overlap")) == 20 + 5 * 3
+
+
+if __name__ == "__main__":
+    print("🧪 Testing risk API endpoints...")
+    test_bulk_stores_every_record()
+    print("   ✅ Bulk batch stored")
+    test_bulk_keeps_valid_records_around_invalid_one()
+    print("   ✅ Invalid record rejected, the rest of the batch stored")
+    test_bulk_keeps_valid_records_around_schema_error()
+    print("   ✅ Schema errors reported per record")
+    test_bulk_rejects_non_list_body()
+    print("   ✅ Non-list body rejected")
+    test_bulk_accepts_empty_batch()
+    print("   ✅ Empty batch accepted")
+    test_overlapping_requests_all_succeed()
+    print("   ✅ Overlapping requests all stored")
@@ -0,0 +1,140 @@
+# test_feature_extractor.py
+"""
+Randomized regression check: FeatureExtractor against a plain-Python
+reference that rescans a sorted event list on every call (the extractor's
+original implementation). Covers out-of-order events, column buffer growth
+and a current_time past the newest event.
+Run directly (python test_feature_extractor.py) or via pytest.
+"""
+
+import bisect
+import math
+import random
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import client.feature_extractor as feature_extractor
+from client.feature_extractor import FeatureExtractor, FeatureVector
+from shared.models import EventType, FocusEvent, IdleEvent, KeystrokeEvent, MouseEvent
+
+FIELDS = ["avg_typing_speed", "avg_idle_duration", "focus_loss_count", "avg_mouse_speed",
+          "inter_key_interval", "window_start", "window_end"]
+
+
+class ReferenceExtractor:
+    """Sorted list of events, pruned and rescanned in full per compute_features."""
+
+    def __init__(self, window_duration: float):
+        self.window_duration = window_duration
+        self.events = []
+
+    def add_event(self, event) -> None:
+        # After any equal timestamps, like the original insertion sort
+        keys = [e.timestamp for e in self.events]
+        self.events.insert(bisect.bisect_right(keys, event.timestamp), event)
+
+    def clear(self) -> None:
+        self.events = []
+
+    def compute_features(self, current_time=None) -> FeatureVector:
+        if current_time is None:
+            current_time = self.events[-1].timestamp if self.events else 0.0
+        cutoff = current_time - self.window_duration
+        self.events = [e for e in self.events if e.timestamp >= cutoff]
+
+        fv = FeatureVector(window_start=cutoff, window_end=current_time)
+        presses = [e.timestamp for e in self.events if e.type == EventType.KEY_PRESS]
+        if len(presses) >= 2:
+            intervals = [b - a for a, b in zip(presses, presses[1:])]
+            fv.inter_key_interval = sum(intervals) / len(intervals)
+            if current_time - cutoff > 0:
+                fv.avg_typing_speed = len(presses) / (current_time - cutoff) * 60
+        idle = [e.duration for e in self.events if e.type == EventType.IDLE_PERIOD]
+        if idle:
+            fv.avg_idle_duration = sum(idle) / len(idle)
+        fv.focus_loss_count = sum(1 for e in self.events if e.type == EventType.FOCUS_LOST)
+        mouse = [(e.timestamp, e.x, e.y) for e in self.events if e.type == EventType.MOUSE_MOVE]
+        if len(mouse) >= 2:
+            distance = sum(math.hypot(x2 - x1, y2 - y1)
+                           for (_, x1, y1), (_, x2, y2) in zip(mouse, mouse[1:]))
+            time_span = mouse[-1][0] - mouse[0][0]
+            if time_span > 0:
+                fv.avg_mouse_speed = distance / time_span
+        return fv
+
+
+def random_events(rng: random.Random, t: float, out_of_order: bool):
+    """One simulated user action at about time t (occasionally backdated)."""
+    if out_of_order and rng.random() < 0.05:
+        t -= rng.uniform(0.0, 5.0)
+    r = rng.random()
+    if r < 0.15:
+        return [IdleEvent(timestamp=t, type=EventType.IDLE_PERIOD, duration=rng.uniform(0.5, 2.0))]
+    if r < 0.55:
+        return [KeystrokeEvent(timestamp=t, type=EventType.KEY_PRESS),
+                KeystrokeEvent(timestamp=t + rng.uniform(0.05, 0.2), type=EventType.KEY_RELEASE)]
+    if r < 0.85:
+        return [MouseEvent(timestamp=t, type=EventType.MOUSE_MOVE,
+                           x=rng.randint(0, 1920), y=rng.randint(0, 1080))]
+    return [FocusEvent(timestamp=t, type=EventType.FOCUS_LOST, lost_focus=True),
+            FocusEvent(timestamp=t + rng.uniform(0.5, 3.0), type=EventType.FOCUS_GAINED, lost_focus=False)]
+
+
+def run_against_reference(seeds, steps: int) -> int:
+    """Feed identical random streams to both extractors; return the number of comparisons."""
+    compared = 0
+    for seed in seeds:
+        rng = random.Random(seed)
+        out_of_order = seed % 2 == 1
+        window = rng.choice([5.0, 10.0, 30.0])
+        expected, actual = ReferenceExtractor(window), FeatureExtractor(window)
+        t = 1000.0
+        for step in range(steps):
+            # Mostly sub-second gaps, with occasional pauses longer than the window
+            t += rng.expovariate(1 / 0.3) if rng.random() > 0.01 else rng.uniform(5.0, 40.0)
+            events = random_events(rng, t, out_of_order)
+            for event in events:
+                expected.add_event(event)
+                actual.add_event(event)
+            if rng.random() < 0.2:
+                # Default (newest event), slightly stale, well in the future,
+                # or exactly one window after an event (cutoff on its timestamp)
+                r = rng.random()
+                if r < 0.6:
+                    current_time = None
+                elif r < 0.9:
+                    current_time = t + rng.uniform(-3.0, 50.0)
+                else:
+                    current_time = events[0].timestamp + window
+                fe, fa = expected.compute_features(current_time), actual.compute_features(current_time)
+                compared += 1
+                for field in FIELDS:
+                    e, a = getattr(fe, field), getattr(fa, field)
+                    assert math.isclose(e, a, rel_tol=1e-7, abs_tol=1e-7), (seed, step, field, e, a)
+            if rng.random() < 0.002:
+                expected.clear()
+                actual.clear()
+    return compared
+
+
+def test_matches_reference():
+    assert run_against_reference(range(20), steps=1500) > 0
+
+
+def test_matches_reference_with_buffer_growth():
+    """A tiny initial capacity forces the columns to compact and grow constantly."""
+    capacity = feature_extractor._BUFFER_CAPACITY
+    feature_extractor._BUFFER_CAPACITY = 4
+    try:
+        assert run_against_reference(range(20, 40), steps=1500) > 0
+    finally:
+        feature_extractor._BUFFER_CAPACITY = capacity
+
+
+if __name__ == "__main__":
+    print("🧪 Testing FeatureExtractor against the reference implementation...")
+    test_matches_reference()
+    print("   ✅ Features match the reference")
+    test_matches_reference_with_buffer_growth()
+    print("   ✅ Features match with buffer growth")
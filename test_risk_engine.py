@@ -0,0 +1,48 @@
+# test_risk_engine.py
+"""
+Regression checks for the RiskEngine moving average.
+Run directly (python test_risk_engine.py) or via pytest.
+"""
+
+import random
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from client.risk_engine import RiskEngine
+
+
+def test_all_zero_window_is_not_negative():
+    """After arbitrary readings, a window of zeros smooths to (almost) 0.0, never below."""
+    rng = random.Random(0)
+    for _ in range(2000):
+        engine = RiskEngine(smoothing_window=5)
+        for _ in range(rng.randint(1, 30)):
+            engine.push_raw_risk(rng.uniform(0.0, 100.0))
+        for _ in range(5):
+            smoothed = engine.push_raw_risk(0.0)
+        assert 0.0 <= smoothed < 1e-9, smoothed
+
+
+def test_smoothed_matches_window_mean():
+    """The running sum tracks a plain mean over the last smoothing_window values."""
+    rng = random.Random(1)
+    for window in (1, 3, 5, 8):
+        engine = RiskEngine(smoothing_window=window)
+        history = []
+        for _ in range(2000):  # spans several periodic resyncs
+            raw = rng.uniform(-20.0, 120.0)
+            smoothed = engine.push_raw_risk(raw)
+            history.append(min(max(raw, 0.0), 100.0))
+            recent = history[-window:]
+            expected = sum(recent) / len(recent)
+            assert abs(smoothed - expected) < 1e-9, (window, smoothed, expected)
+            assert 0.0 <= smoothed <= 100.0
+
+
+if __name__ == "__main__":
+    print("🧪 Testing RiskEngine smoothing...")
+    test_all_zero_window_is_not_negative()
+    print("   ✅ All-zero window gives 0.0, never a negative residue")
+    test_smoothed_matches_window_mean()
+    print("   ✅ Smoothed risk matches the window mean")